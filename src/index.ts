@@ -16,7 +16,8 @@ import {
 } from "@modelcontextprotocol/sdk/types.js";
 import { StdioServerTransport } from "@modelcontextprotocol/sdk/server/stdio.js";
 import { z } from "zod";
-import { readdir, readFile, stat } from "fs/promises";
+import { open, readdir, stat } from "fs/promises";
+import type { FileHandle } from "fs/promises";
 import { join, resolve } from "path";
 import { homedir } from "os";
 
@@ -46,24 +47,79 @@ function log(level: 'info' | 'error' | 'warn', message: string, data?: any) {
   }
 }
 
+// Compiled once at module load rather than on every validation call
+const RSID_PATTERN = /^rs\d+$/;
+
 /**
  * Validate RSID format: must start with 'rs' followed by digits.
  */
 function validateRsid(rsid: string): boolean {
-  const pattern = /^rs\d+$/;
-  return pattern.test(rsid.trim());
+  return RSID_PATTERN.test(rsid.trim());
 }
 
+// A subject name must be a single directory entry inside SAMPLES_DIR: no path
+// separators or NUL bytes, not "." or "..", and within filename length limits
+const SUBJECT_NAME_PATTERN = /^(?!\.\.?$)[^/\\\0]{1,255}$/;
+
 /**
- * Check if a file exists
+ * Validate a subject name before it is joined onto the DNA profiles directory.
  */
-async function fileExists(filePath: string): Promise<boolean> {
-  try {
-    await stat(filePath);
-    return true;
-  } catch {
-    return false;
+function validateSubjectName(subjectName: string): boolean {
+  return SUBJECT_NAME_PATTERN.test(subjectName);
+}
+
+// Cache of resolved subject directory paths, bounded like the pattern cache below.
+// Only the path string is cached; the directory's existence is still checked per call.
+const SUBJECT_DIR_CACHE_SIZE = 256;
+const subjectDirCache = new Map<string, string>();
+
+/**
+ * Resolve a (validated) subject name to its directory inside SAMPLES_DIR.
+ */
+function getSubjectDir(subjectName: string): string {
+  let subjectDir = subjectDirCache.get(subjectName);
+  if (subjectDir !== undefined) {
+    // Re-insert to mark as most recently used
+    subjectDirCache.delete(subjectName);
+  } else {
+    subjectDir = join(SAMPLES_DIR, subjectName);
+    if (subjectDirCache.size >= SUBJECT_DIR_CACHE_SIZE) {
+      subjectDirCache.delete(subjectDirCache.keys().next().value as string);
+    }
+  }
+  subjectDirCache.set(subjectName, subjectDir);
+  return subjectDir;
+}
+
+// Cache of compiled list_subjects filter patterns, bounded to avoid unbounded growth
+const PATTERN_CACHE_SIZE = 128;
+const patternCache = new Map<string, RegExp>();
+
+/**
+ * Compile a user-supplied regex pattern, reusing a cached RegExp for repeated filters.
+ * Throws a SyntaxError for invalid patterns (invalid patterns are never cached).
+ */
+function compilePattern(pattern: string): RegExp {
+  let regex = patternCache.get(pattern);
+  if (regex) {
+    // Re-insert to mark as most recently used
+    patternCache.delete(pattern);
+  } else {
+    regex = new RegExp(pattern);
+    if (patternCache.size >= PATTERN_CACHE_SIZE) {
+      patternCache.delete(patternCache.keys().next().value as string);
+    }
   }
+  patternCache.set(pattern, regex);
+  return regex;
+}
+
+/**
+ * Check if an error means a path (or one of its parent directories) does not exist
+ */
+function isNotFoundError(error: unknown): boolean {
+  const code = error instanceof Error ? (error as any).code : undefined;
+  return code === 'ENOENT' || code === 'ENOTDIR';
 }
 
 /**
@@ -99,6 +155,7 @@ const QuerySnpDataSchema = z.object({
 // Configuration constants
 const MAX_FILE_SIZE = 100 * 1024 * 1024; // 100MB limit for SNP files
 const OPERATION_TIMEOUT = 30000; // 30 second timeout for operations
+const INDEX_CHUNK_SIZE = 4 * 1024 * 1024; // Bytes of SNP data indexed between event loop yields
 
 // Create the MCP server with enhanced configuration
 const server = new Server({
@@ -112,35 +169,320 @@ const server = new Server({
 
 // Enhanced file reading with size and timeout protection
 async function safeReadFile(filePath: string, maxSize: number = MAX_FILE_SIZE): Promise<string> {
+  return (await safeReadBuffer(filePath, maxSize)).toString('utf-8');
+}
+
+// Raw-bytes variant of safeReadFile, for callers that decode only what they need
+async function safeReadBuffer(filePath: string, maxSize: number = MAX_FILE_SIZE): Promise<Buffer> {
   return new Promise(async (resolve, reject) => {
     const timeout = setTimeout(() => {
       reject(new Error(`File read timeout after ${OPERATION_TIMEOUT/1000} seconds. The file may be too large or the system may be under heavy load. Try again or check file size.`));
     }, OPERATION_TIMEOUT);
 
+    let handle: FileHandle | undefined;
     try {
-      const stats = await stat(filePath);
+      // Open once and check the size on the open descriptor, so the path is
+      // only resolved a single time
+      handle = await open(filePath, 'r');
+      const stats = await handle.stat();
       if (stats.size > maxSize) {
         clearTimeout(timeout);
         reject(new Error(`File too large: ${(stats.size/1024/1024).toFixed(1)}MB (max ${maxSize/1024/1024}MB). Please reduce file size or split the data into smaller files.`));
         return;
       }
 
-      const content = await readFile(filePath, 'utf-8');
+      const content = await handle.readFile();
       clearTimeout(timeout);
       resolve(content);
     } catch (error) {
       clearTimeout(timeout);
       if (error instanceof Error && (error as any).code === 'ENOENT') {
-        reject(new Error(`File not found: ${filePath}. Please check the file path and ensure the file exists.`));
+        // Keep the code so callers can tell a missing file from other read failures
+        reject(Object.assign(new Error(`File not found: ${filePath}. Please check the file path and ensure the file exists.`), { code: 'ENOENT' }));
       } else if (error instanceof Error && (error as any).code === 'EACCES') {
         reject(new Error(`Permission denied: ${filePath}. Please check file permissions and ensure you have read access.`));
       } else {
         reject(error);
       }
+    } finally {
+      // Best effort: the promise has already settled by the time the file is closed
+      await handle?.close().catch(() => undefined);
     }
   });
 }
 
+/**
+ * In-memory RSID index for a snp.txt file. Rows are stored column-wise in typed
+ * arrays (the numeric part of each row's RSID and the byte offset of that row),
+ * sorted by RSID, so a query is a binary search plus a positioned read instead
+ * of a scan of the whole file. Only RSIDs and offsets are held, never genotypes.
+ */
+interface SnpIndex {
+  header: string | null; // Comma-delimited header, parsed once per file version
+  rsids: Float64Array; // Numeric RSIDs, sorted ascending (rows sharing an RSID in file order)
+  offsets: Uint32Array; // Byte offset of the row for each entry in rsids
+  oversizedOffsets: Uint32Array; // Rows whose RSID number is too large to compare exactly, in file order
+}
+
+// Indexes by file path, bounded like the other caches. Each entry holds the build
+// promise, so concurrent first queries for a file share one build.
+const SNP_INDEX_CACHE_SIZE = 8;
+const snpIndexCache = new Map<string, { mtimeMs: number; size: number; index: Promise<SnpIndex> }>();
+
+/**
+ * Append the RSID number and offset of each row in data[start, end), or only the
+ * offset (to oversizedOffsets) when the number is beyond exact integer precision.
+ * `end` must fall on a line boundary.
+ */
+function indexSnpLines(data: Buffer, start: number, end: number, rsidNumbers: number[], offsets: number[], oversizedOffsets: number[]): void {
+  let pos = start;
+  while (pos < end) {
+    let lineEnd = data.indexOf(0x0a, pos);
+    if (lineEnd === -1) lineEnd = data.length;
+    // Parse "rs<digits>\t" in place instead of slicing the RSID out and converting it
+    if (data[pos] === 0x72 && data[pos + 1] === 0x73) { // "rs"
+      let rsidNumber = 0;
+      let i = pos + 2;
+      let code = data[i];
+      while (code >= 0x30 && code <= 0x39) { // "0"-"9"
+        rsidNumber = rsidNumber * 10 + (code - 0x30);
+        code = data[++i];
+      }
+      if (code === 0x09 && i > pos + 2) { // "\t"
+        if (Number.isSafeInteger(rsidNumber)) {
+          rsidNumbers.push(rsidNumber);
+          offsets.push(pos);
+        } else {
+          oversizedOffsets.push(pos);
+        }
+      }
+    }
+    pos = lineEnd + 1;
+  }
+}
+
+/**
+ * Return the RSID index for a SNP file, rebuilding it when the file's mtime or size changed.
+ */
+async function getSnpIndex(snpFile: string): Promise<SnpIndex> {
+  const stats = await stat(snpFile);
+  let entry = snpIndexCache.get(snpFile);
+  if (entry) {
+    // Re-insert to mark as most recently used
+    snpIndexCache.delete(snpFile);
+  }
+  if (!entry || entry.mtimeMs !== stats.mtimeMs || entry.size !== stats.size) {
+    if (snpIndexCache.size >= SNP_INDEX_CACHE_SIZE) {
+      snpIndexCache.delete(snpIndexCache.keys().next().value as string);
+    }
+    const newEntry = { mtimeMs: stats.mtimeMs, size: stats.size, index: buildSnpIndex(snpFile) };
+    // Drop failed builds so the next query retries instead of reusing the rejection
+    newEntry.index.catch(() => {
+      if (snpIndexCache.get(snpFile) === newEntry) {
+        snpIndexCache.delete(snpFile);
+      }
+    });
+    entry = newEntry;
+  }
+  snpIndexCache.set(snpFile, entry);
+  return entry.index;
+}
+
+/**
+ * Let pending I/O and other requests run before continuing a long computation.
+ */
+function yieldToEventLoop(): Promise<void> {
+  return new Promise<void>(resolve => setImmediate(() => resolve()));
+}
+
+/**
+ * Stable LSD radix sort of RSID numbers (safe integers) with their row offsets,
+ * one byte per pass. A comparison sort of a whole file's rows is a single
+ * blocking call; here each pass is linear and the event loop runs between passes.
+ */
+async function sortByRsid(rsids: Float64Array, offsets: Uint32Array): Promise<{ rsids: Float64Array; offsets: Uint32Array }> {
+  const rowCount = rsids.length;
+  let max = 0;
+  for (let i = 0; i < rowCount; i++) {
+    if (rsids[i] > max) max = rsids[i];
+  }
+
+  let nextRsids: Float64Array = new Float64Array(rowCount);
+  let nextOffsets: Uint32Array = new Uint32Array(rowCount);
+  const counts = new Uint32Array(256);
+  for (let shift = 0; 2 ** shift <= max; shift += 8) {
+    // Bits above 32 are out of reach of the bitwise operators, so take them from the high word
+    const digit = shift < 32
+      ? (value: number) => (value >>> shift) & 0xff
+      : (value: number) => (Math.floor(value / 0x100000000) >>> (shift - 32)) & 0xff;
+
+    counts.fill(0);
+    for (let i = 0; i < rowCount; i++) {
+      counts[digit(rsids[i])]++;
+    }
+    let position = 0;
+    for (let d = 0; d < 256; d++) {
+      const count = counts[d];
+      counts[d] = position;
+      position += count;
+    }
+    for (let i = 0; i < rowCount; i++) {
+      const target = counts[digit(rsids[i])]++;
+      nextRsids[target] = rsids[i];
+      nextOffsets[target] = offsets[i];
+    }
+
+    [rsids, nextRsids] = [nextRsids, rsids];
+    [offsets, nextOffsets] = [nextOffsets, offsets];
+    await yieldToEventLoop();
+  }
+  return { rsids, offsets };
+}
+
+/**
+ * Read a SNP file and build its RSID index.
+ */
+async function buildSnpIndex(snpFile: string): Promise<SnpIndex> {
+  // Work on the raw bytes: only the header is ever decoded while indexing, and
+  // matched rows are decoded individually when they are read back at query time
+  const data = await safeReadBuffer(snpFile);
+
+  // First non-empty line is the header
+  let header: string | null = null;
+  let dataStart = 0;
+  while (header === null && dataStart < data.length) {
+    let lineEnd = data.indexOf(0x0a, dataStart);
+    if (lineEnd === -1) lineEnd = data.length;
+    const trimmedLine = data.toString('utf-8', dataStart, lineEnd).trim();
+    if (trimmedLine) {
+      // Convert header from tab-delimited to comma-delimited
+      header = trimmedLine.replace(/\t/g, ',');
+    }
+    dataStart = lineEnd + 1;
+  }
+
+  // Index in newline-aligned chunks, yielding between them so building the index
+  // for a large file does not block the event loop for other requests
+  const rsidNumbers: number[] = [];
+  const rowOffsets: number[] = [];
+  const oversizedOffsets: number[] = [];
+  let chunkStart = dataStart;
+  while (chunkStart < data.length) {
+    const chunkEnd = data.indexOf(0x0a, Math.min(chunkStart + INDEX_CHUNK_SIZE, data.length));
+    const end = chunkEnd === -1 ? data.length : chunkEnd + 1;
+    indexSnpLines(data, chunkStart, end, rsidNumbers, rowOffsets, oversizedOffsets);
+    chunkStart = end;
+    if (chunkStart < data.length) {
+      await yieldToEventLoop();
+    }
+  }
+  // Rows were collected in file order, so a stable sort keeps rows sharing an RSID in file order
+  const { rsids, offsets } = await sortByRsid(Float64Array.from(rsidNumbers), Uint32Array.from(rowOffsets));
+
+  log('info', 'Built SNP index', { file: snpFile, rows: rsids.length });
+  return { header, rsids, offsets, oversizedOffsets: Uint32Array.from(oversizedOffsets) };
+}
+
+/**
+ * Offsets of the candidate rows for an RSID, in file order. Callers must still
+ * compare each row's first column with the RSID exactly.
+ */
+function lookupSnpOffsets(index: SnpIndex, rsid: string): number[] {
+  const rsidNumber = Number(rsid.slice(2));
+  if (!Number.isSafeInteger(rsidNumber)) {
+    // Too large for an exact numeric lookup: fall back to the (rare) rows that were
+    // indexed by offset only and let the caller's string comparison decide
+    return Array.from(index.oversizedOffsets);
+  }
+
+  const { rsids, offsets } = index;
+  let low = 0;
+  let high = rsids.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (rsids[mid] < rsidNumber) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+
+  const matches: number[] = [];
+  for (let i = low; i < rsids.length && rsids[i] === rsidNumber; i++) {
+    matches.push(offsets[i]);
+  }
+  return matches;
+}
+
+/**
+ * Read the line starting at the given byte offset of an open file, without its newline.
+ */
+async function readLineAt(handle: FileHandle, offset: number): Promise<string> {
+  // SNP rows are short; grow the read window only for unusually long lines
+  let length = 256;
+  for (;;) {
+    const buffer = Buffer.alloc(length);
+    const { bytesRead } = await handle.read(buffer, 0, length, offset);
+    const newline = buffer.subarray(0, bytesRead).indexOf(0x0a);
+    if (newline !== -1) {
+      return buffer.toString('utf-8', 0, newline);
+    }
+    if (bytesRead < length) {
+      return buffer.toString('utf-8', 0, bytesRead);
+    }
+    length *= 2;
+  }
+}
+
+// Response payloads returned (as JSON text) by the tools
+interface ErrorResult {
+  error: string;
+}
+
+interface InfoResult {
+  subject: string;
+  info: string | null;
+  message?: string;
+}
+
+interface SnpQueryResult {
+  subject: string;
+  header: string | null;
+  matching_rows: string[];
+  queried_rsids: string[];
+  found_count: number;
+  found_rsids: string[];
+  not_found_rsids: string[];
+}
+
+type ToolPayload = string[] | ErrorResult | InfoResult | SnpQueryResult;
+
+/**
+ * Wrap a tool payload as a single JSON text content block
+ */
+function jsonResult(payload: ToolPayload) {
+  return {
+    content: [
+      {
+        type: "text" as const,
+        text: JSON.stringify(payload),
+      },
+    ],
+  };
+}
+
+/**
+ * Error payload for a subject name that fails validation, or null if the name is valid
+ */
+function invalidSubjectResult(subjectName: string): ErrorResult | null {
+  if (validateSubjectName(subjectName)) {
+    return null;
+  }
+  return {
+    error: `Invalid subject name '${subjectName}'. Subject names must be a single directory name inside the DNA profiles directory, without path separators. Available subjects can be listed using the 'list_subjects' tool.`
+  };
+}
+
 // Tool handlers
 server.setRequestHandler(ListToolsRequestSchema, async () => {
   return {
@@ -219,190 +561,135 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
       case "list_subjects": {
         const { pattern } = ListSubjectsSchema.parse(args);
         
+        // Compile the regex filter up front so an invalid pattern fails before any I/O
+        let regex: RegExp | null = null;
+        if (pattern) {
+          try {
+            regex = compilePattern(pattern);
+          } catch (e) {
+            return jsonResult([`Error: Invalid regex pattern '${pattern}': ${e}. Please use valid JavaScript regex syntax (e.g., 'john.*' for names starting with 'john').`]);
+          }
+        }
+
         try {
           if (!(await directoryExists(SAMPLES_DIR))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify([]),
-                },
-              ],
-            };
+            return jsonResult([]);
           }
 
-          const items = await readdir(SAMPLES_DIR);
+          // withFileTypes reuses the entry type from the directory read,
+          // avoiding a separate stat() per entry
+          const entries = await readdir(SAMPLES_DIR, { withFileTypes: true });
           const subjects: string[] = [];
 
-          for (const item of items) {
-            const itemPath = join(SAMPLES_DIR, item);
-            if (await directoryExists(itemPath)) {
-              subjects.push(item);
-            }
-          }
-
-          let filteredSubjects = subjects;
+          // Filter in the same pass so only matching subjects are collected
+          for (const entry of entries) {
+            if (regex && !regex.test(entry.name)) continue;
 
-          // Apply regex filter if pattern is provided
-          if (pattern) {
-            try {
-              const regex = new RegExp(pattern);
-              filteredSubjects = subjects.filter(subject => regex.test(subject));
-            } catch (e) {
-              return {
-                content: [
-                  {
-                    type: "text",
-                    text: JSON.stringify([`Error: Invalid regex pattern '${pattern}': ${e}. Please use valid JavaScript regex syntax (e.g., 'john.*' for names starting with 'john').`]),
-                  },
-                ],
-              };
+            // Symlinked subject directories still need a stat to resolve their target
+            if (entry.isDirectory() ||
+                (entry.isSymbolicLink() && await directoryExists(join(SAMPLES_DIR, entry.name)))) {
+              subjects.push(entry.name);
             }
           }
 
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify(filteredSubjects.sort()),
-              },
-            ],
-          };
+          return jsonResult(subjects.sort());
         } catch (e) {
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify([`Error accessing DNA profiles directory: ${e}. Please ensure the directory '${SAMPLES_DIR}' exists and you have read permissions. Create it with: mkdir -p "${SAMPLES_DIR}"`]),
-              },
-            ],
-          };
+          return jsonResult([`Error accessing DNA profiles directory: ${e}. Please ensure the directory '${SAMPLES_DIR}' exists and you have read permissions. Create it with: mkdir -p "${SAMPLES_DIR}"`]);
         }
       }
 
       case "get_test_info": {
         const { subject_name } = GetTestInfoSchema.parse(args);
         
+        const invalidSubject = invalidSubjectResult(subject_name);
+        if (invalidSubject) {
+          return jsonResult(invalidSubject);
+        }
+
         try {
-          const subjectDir = join(SAMPLES_DIR, subject_name);
+          const subjectDir = getSubjectDir(subject_name);
           const infoFile = join(subjectDir, "test_info.txt");
 
-          if (!(await directoryExists(subjectDir))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({ 
-                    error: `Subject '${subject_name}' not found. Available subjects can be listed using the 'list_subjects' tool. To create this subject, run: mkdir -p "${subjectDir}" and add a snp.txt file.` 
-                  }),
-                },
-              ],
-            };
-          }
+          // Read directly and only probe the subject directory if the file is
+          // missing, instead of checking both paths up front on every call
+          let content: string;
+          try {
+            content = await safeReadFile(infoFile);
+          } catch (e) {
+            if (!isNotFoundError(e)) throw e;
+
+            if (!(await directoryExists(subjectDir))) {
+              return jsonResult({ 
+                error: `Subject '${subject_name}' not found. Available subjects can be listed using the 'list_subjects' tool. To create this subject, run: mkdir -p "${subjectDir}" and add a snp.txt file.` 
+              });
+            }
 
-          if (!(await fileExists(infoFile))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({
-                    subject: subject_name,
-                    info: null,
-                    message: `No test_info.txt file found for subject '${subject_name}'. You can create this optional file to add information about the DNA test itself (company, date, array version, etc.).`,
-                  }),
-                },
-              ],
-            };
+            return jsonResult({
+              subject: subject_name,
+              info: null,
+              message: `No test_info.txt file found for subject '${subject_name}'. You can create this optional file to add information about the DNA test itself (company, date, array version, etc.).`,
+            });
           }
 
-          const content = await safeReadFile(infoFile);
-
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify({
-                  subject: subject_name,
-                  info: content.trim(),
-                }),
-              },
-            ],
-          };
+          return jsonResult({
+            subject: subject_name,
+            info: content.trim(),
+          });
         } catch (e) {
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify({ error: `Error reading test info for '${subject_name}': ${e}. Please check that the file exists and you have read permissions. File should be at: ${join(SAMPLES_DIR, subject_name, "test_info.txt")}` }),
-              },
-            ],
-          };
+          return jsonResult({ error: `Error reading test info for '${subject_name}': ${e}. Please check that the file exists and you have read permissions. File should be at: ${join(getSubjectDir(subject_name), "test_info.txt")}` });
         }
       }
 
       case "get_subject_info": {
         const { subject_name } = GetSubjectInfoSchema.parse(args);
         
+        const invalidSubject = invalidSubjectResult(subject_name);
+        if (invalidSubject) {
+          return jsonResult(invalidSubject);
+        }
+
         try {
-          const subjectDir = join(SAMPLES_DIR, subject_name);
+          const subjectDir = getSubjectDir(subject_name);
           const infoFile = join(subjectDir, "subject_info.txt");
 
-          if (!(await directoryExists(subjectDir))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({ 
-                    error: `Subject '${subject_name}' not found. Available subjects can be listed using the 'list_subjects' tool. To create this subject, run: mkdir -p "${subjectDir}" and add a snp.txt file.` 
-                  }),
-                },
-              ],
-            };
-          }
+          // Read directly and only probe the subject directory if the file is
+          // missing, instead of checking both paths up front on every call
+          let content: string;
+          try {
+            content = await safeReadFile(infoFile);
+          } catch (e) {
+            if (!isNotFoundError(e)) throw e;
+
+            if (!(await directoryExists(subjectDir))) {
+              return jsonResult({ 
+                error: `Subject '${subject_name}' not found. Available subjects can be listed using the 'list_subjects' tool. To create this subject, run: mkdir -p "${subjectDir}" and add a snp.txt file.` 
+              });
+            }
 
-          if (!(await fileExists(infoFile))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({
-                    subject: subject_name,
-                    info: null,
-                    message: `No subject_info.txt file found for subject '${subject_name}'. You can create this optional file to add personal information about the individual (demographics, background, etc.).`,
-                  }),
-                },
-              ],
-            };
+            return jsonResult({
+              subject: subject_name,
+              info: null,
+              message: `No subject_info.txt file found for subject '${subject_name}'. You can create this optional file to add personal information about the individual (demographics, background, etc.).`,
+            });
           }
 
-          const content = await safeReadFile(infoFile);
-
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify({
-                  subject: subject_name,
-                  info: content.trim(),
-                }),
-              },
-            ],
-          };
+          return jsonResult({
+            subject: subject_name,
+            info: content.trim(),
+          });
         } catch (e) {
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify({ error: `Error reading subject info for '${subject_name}': ${e}. Please check that the file exists and you have read permissions. File should be at: ${join(SAMPLES_DIR, subject_name, "subject_info.txt")}` }),
-              },
-            ],
-          };
+          return jsonResult({ error: `Error reading subject info for '${subject_name}': ${e}. Please check that the file exists and you have read permissions. File should be at: ${join(getSubjectDir(subject_name), "subject_info.txt")}` });
         }
       }
 
       case "query_snp_data": {
         const { subject_name, rsids: rsidsInput } = QuerySnpDataSchema.parse(args);
         
+        const invalidSubject = invalidSubjectResult(subject_name);
+        if (invalidSubject) {
+          return jsonResult(invalidSubject);
+        }
+
         // Log input type for debugging complex serialization issues
         log('info', 'query_snp_data input', { 
           subject: subject_name,
@@ -450,29 +737,15 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
 
           // Validate RSID count (privacy protection)
           if (rsids.length > 10) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({ 
-                    error: `Maximum 10 RSIDs allowed per query for privacy protection. You provided ${rsids.length} RSIDs. Please reduce your query to 10 or fewer RSIDs and try again.` 
-                  }),
-                },
-              ],
-            };
+            return jsonResult({ 
+              error: `Maximum 10 RSIDs allowed per query for privacy protection. You provided ${rsids.length} RSIDs. Please reduce your query to 10 or fewer RSIDs and try again.` 
+            });
           }
 
           if (rsids.length === 0) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({ 
-                    error: "At least 1 RSID must be provided. Please provide a valid RSID (e.g., 'rs3131972') or an array of RSIDs (e.g., ['rs3131972', 'rs1815739'])." 
-                  }),
-                },
-              ],
-            };
+            return jsonResult({ 
+              error: "At least 1 RSID must be provided. Please provide a valid RSID (e.g., 'rs3131972') or an array of RSIDs (e.g., ['rs3131972', 'rs1815739'])." 
+            });
           }
 
           // Validate RSID formats
@@ -484,107 +757,91 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
               totalCount: rsids.length,
               examples: invalidRsids.slice(0, 3) // Show first 3 invalid ones
             });
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({
-                    error: `Invalid RSID format(s): ${JSON.stringify(invalidRsids)}. RSIDs must match pattern: rs followed by digits (e.g., rs123456)`
-                  }),
-                },
-              ],
-            };
+            return jsonResult({
+              error: `Invalid RSID format(s): ${JSON.stringify(invalidRsids)}. RSIDs must match pattern: rs followed by digits (e.g., rs123456)`
+            });
           }
 
-          // Validate subject exists
-          const subjectDir = join(SAMPLES_DIR, subject_name);
+          const subjectDir = getSubjectDir(subject_name);
           const snpFile = join(subjectDir, "snp.txt");
 
-          if (!(await directoryExists(subjectDir))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({ 
-                    error: `Subject '${subject_name}' not found. Available subjects can be listed using the 'list_subjects' tool. To create this subject, run: mkdir -p "${subjectDir}" and add a snp.txt file.` 
-                  }),
-                },
-              ],
-            };
-          }
+          // Look the RSIDs up in the file's index and read only the matching rows.
+          // The index lookup stats the file anyway, so only probe the subject
+          // directory when that fails rather than checking both paths up front.
+          let index: SnpIndex;
+          try {
+            index = await getSnpIndex(snpFile);
+          } catch (e) {
+            if (!isNotFoundError(e)) throw e;
+
+            if (!(await directoryExists(subjectDir))) {
+              return jsonResult({ 
+                error: `Subject '${subject_name}' not found. Available subjects can be listed using the 'list_subjects' tool. To create this subject, run: mkdir -p "${subjectDir}" and add a snp.txt file.` 
+              });
+            }
 
-          if (!(await fileExists(snpFile))) {
-            return {
-              content: [
-                {
-                  type: "text",
-                  text: JSON.stringify({ 
-                    error: `No snp.txt file found for subject '${subject_name}'. Please create a tab-delimited SNP file at: ${snpFile}. The file should have columns: rsid, chromosome, position, allele1, allele2.` 
-                  }),
-                },
-              ],
-            };
+            return jsonResult({ 
+              error: `No snp.txt file found for subject '${subject_name}'. Please create a tab-delimited SNP file at: ${snpFile}. The file should have columns: rsid, chromosome, position, allele1, allele2.` 
+            });
           }
 
-          // Read and process the SNP file
-          const fileContent = await safeReadFile(snpFile);
-          const lines = fileContent.split('\n');
-          
-          let header: string | null = null;
+          const rsidSet = new Set(rsids);
           const matchingRows: string[] = [];
           const foundRsids = new Set<string>();
 
-          for (const line of lines) {
-            const trimmedLine = line.trim();
-            if (!trimmedLine) continue;
-
-            // First non-empty line is the header
-            if (header === null) {
-              // Convert header from tab-delimited to comma-delimited
-              header = trimmedLine.replace(/\t/g, ',');
-              continue;
+          const matches: Array<{ offset: number; rsid: string }> = [];
+          for (const rsid of rsidSet) {
+            for (const offset of lookupSnpOffsets(index, rsid)) {
+              matches.push({ offset, rsid });
             }
+          }
+          // Report rows in file order, as a line-by-line scan would
+          matches.sort((a, b) => a.offset - b.offset);
 
-            // Split the line and check if first column matches any RSID
-            const columns = trimmedLine.split('\t');
-            if (columns.length > 0 && rsids.includes(columns[0])) {
-              // Convert row from tab-delimited to comma-delimited
-              const commaDelimitedRow = columns.join(',');
-              matchingRows.push(commaDelimitedRow);
-              foundRsids.add(columns[0]);
+          // Only open the file when the index has candidate rows; a query whose
+          // RSIDs are all absent is answered from the index alone
+          if (matches.length > 0) {
+            const handle = await open(snpFile, 'r');
+            try {
+              // Issue every row read together instead of one at a time
+              const lines = await Promise.all(matches.map(match => readLineAt(handle, match.offset)));
+
+              for (let i = 0; i < matches.length; i++) {
+                const match = matches[i];
+                // Indexed rows always start with "rs", so only trailing whitespace
+                // (such as the \r of CRLF files) needs removing
+                const line = lines[i].trimEnd();
+                // Numeric lookup ignores leading zeros and the file may have changed
+                // since indexing, so confirm the first column is the exact RSID.
+                // Only that column is needed, so slice it out instead of splitting the row.
+                const firstTab = line.indexOf('\t');
+                if (line.slice(0, firstTab === -1 ? line.length : firstTab) !== match.rsid) continue;
+
+                // Convert row from tab-delimited to comma-delimited
+                matchingRows.push(line.replace(/\t/g, ','));
+                foundRsids.add(match.rsid);
+              }
+            } finally {
+              await handle.close();
             }
           }
 
           // Determine which RSIDs were not found
           const notFoundRsids = rsids.filter(rsid => !foundRsids.has(rsid));
 
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify({
-                  subject: subject_name,
-                  header,
-                  matching_rows: matchingRows,
-                  queried_rsids: rsids,
-                  found_count: matchingRows.length,
-                  found_rsids: Array.from(foundRsids),
-                  not_found_rsids: notFoundRsids,
-                }),
-              },
-            ],
-          };
+          return jsonResult({
+            subject: subject_name,
+            header: index.header,
+            matching_rows: matchingRows,
+            queried_rsids: rsids,
+            found_count: matchingRows.length,
+            found_rsids: Array.from(foundRsids),
+            not_found_rsids: notFoundRsids,
+          });
         } catch (e) {
-          return {
-            content: [
-              {
-                type: "text",
-                text: JSON.stringify({ 
-                  error: `Error querying SNP data for '${subject_name}': ${e}. Please check that the snp.txt file exists, is readable, and contains valid tab-delimited data. File location: ${join(SAMPLES_DIR, subject_name, 'snp.txt')}` 
-                }),
-              },
-            ],
-          };
+          return jsonResult({ 
+            error: `Error querying SNP data for '${subject_name}': ${e}. Please check that the snp.txt file exists, is readable, and contains valid tab-delimited data. File location: ${join(getSubjectDir(subject_name), 'snp.txt')}` 
+          });
         }
       }
 